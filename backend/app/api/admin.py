@@ -28,7 +28,12 @@ async def get_admin_stats(current_admin = Depends(get_current_admin), db = Depen
         db.execute("SELECT COUNT(*) as total FROM history")
         total_queries = db.fetchone()["total"]
         
-        db.execute("SELECT COUNT(*) as today FROM history WHERE DATE(timestamp) = CURRENT_DATE")
+        # Compare timestamp directly (not DATE(timestamp)) so only the current partition is scanned
+        db.execute("""
+            SELECT COUNT(*) as today 
+            FROM history 
+            WHERE timestamp >= CURRENT_DATE AND timestamp < CURRENT_DATE + INTERVAL '1 day'
+        """)
         queries_today = db.fetchone()["today"]
         
         average_per_user = total_queries / total_users if total_users > 0 else 0
@@ -1,8 +1,14 @@
+import json
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from fastapi import APIRouter, Depends, HTTPException
+from fastapi.responses import StreamingResponse
+from starlette.background import BackgroundTask
+from psycopg2.extras import execute_values
+from .. import config
 from ..auth.utils import get_current_user
 from ..database import get_db
-from ..models.schemas import QuestionRequest, AnswerResponse
-from ..rag.agent import get_agent
+from ..models.schemas import QuestionRequest, AnswerResponse, BatchQuestionRequest
+from ..rag.agent import get_agent, retrieve_documents_batch
 
 router = APIRouter()
 
@@ -36,3 +42,86 @@ def ask_question(request: QuestionRequest, current_user = Depends(get_current_us
         return {"answer": result}
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
+
+@router.post("/ask/batch")
+def ask_questions_batch(request: BatchQuestionRequest, current_user = Depends(get_current_user), db = Depends(get_db)):
+    """Answer a batch of questions, streaming each answer as NDJSON when it finishes.
+
+    Lines are emitted in completion order and carry the index of the question
+    in the request. All answers are saved to history in a single insert by a
+    background task that runs after the response ends, including on disconnect.
+    """
+    questions = [q.strip() for q in request.questions]
+    if not questions:
+        raise HTTPException(status_code=400, detail="At least one question is required")
+    if len(questions) > config.QA_BATCH_MAX_QUESTIONS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"A batch can contain at most {config.QA_BATCH_MAX_QUESTIONS} questions"
+        )
+    if any(not q for q in questions):
+        raise HTTPException(status_code=400, detail="Questions must not be empty")
+
+    try:
+        # Build the agent once for the whole batch; documents are retrieved
+        # up front below, so it does not need its own retrieval tool
+        agent = get_agent(with_retrieval=False)
+
+        # Get user history for context
+        db.execute(
+            "SELECT question, answer FROM history WHERE user_id = %s ORDER BY timestamp DESC LIMIT 3",
+            (current_user["id"],)
+        )
+        history = db.fetchall()
+        history_context = "\n".join([f"Q: {h['question']}\nA: {h['answer']}" for h in history]) if history else ""
+
+        # Retrieve documents for all questions up front
+        retrieved = retrieve_documents_batch(db, questions)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+    # Answers are recorded by the worker threads themselves, so they are saved
+    # even if the client disconnects before they are streamed
+    answered = {}
+
+    def answer(index):
+        documents = "\n\n".join(doc.content for doc in retrieved[index] if doc.content)
+        context = "\n\n".join(part for part in (history_context, documents) if part)
+        result = agent.run(questions[index], context=context)
+        answered[index] = result
+        return result
+
+    executor = ThreadPoolExecutor(max_workers=max(1, config.QA_BATCH_CONCURRENCY))
+    futures = {executor.submit(answer, i): i for i in range(len(questions))}
+
+    def stream():
+        for future in as_completed(futures):
+            index = futures[future]
+            try:
+                result = future.result()
+            except Exception as e:
+                yield json.dumps({"index": index, "error": str(e)}) + "\n"
+                continue
+            yield json.dumps({"index": index, "answer": result}) + "\n"
+
+    def save_answers():
+        """Save all answers to history in one statement once the response ends."""
+        # If the client disconnected, drop queued questions but let the calls
+        # that were already running finish
+        executor.shutdown(wait=True, cancel_futures=True)
+
+        if answered:
+            rows = [(current_user["id"], questions[index], result) for index, result in sorted(answered.items())]
+            with get_db() as history_db:
+                execute_values(
+                    history_db,
+                    "INSERT INTO history (user_id, question, answer) VALUES %s",
+                    rows,
+                    page_size=len(rows)
+                )
+
+    return StreamingResponse(
+        stream(),
+        media_type="application/x-ndjson",
+        background=BackgroundTask(save_answers)
+    )
@@ -23,3 +23,25 @@ JWT_EXPIRATION = 60 * 24  # 24 hours in minutes
 # Application settings
 DEBUG = os.getenv("DEBUG", "True").lower() == "true"
 API_PREFIX = "/api"
+
+# Batch Q&A settings
+QA_BATCH_MAX_QUESTIONS = int(os.getenv("QA_BATCH_MAX_QUESTIONS", "50"))
+QA_BATCH_CONCURRENCY = int(os.getenv("QA_BATCH_CONCURRENCY", "4"))
+QA_RETRIEVAL_TOP_K = int(os.getenv("QA_RETRIEVAL_TOP_K", "3"))
+
+# Subject-aware retrieval settings
+SUBJECT_MIN_SCORE = int(os.getenv("SUBJECT_MIN_SCORE", "2"))
+# Share (0-1) of a question's search terms that its best subject-filtered
+# document must contain; otherwise the whole corpus is searched. Instruction
+# words ("describe", "explain", ...) are removed first, so e.g. "Describe the
+# brachial plexus" has two terms and a chunk naming both scores 1.0. At 0.5 a
+# subject hit is kept when it matches at least half of the topic terms, which
+# does not depend on question length the way ts_rank over OR'd terms does.
+RETRIEVAL_FALLBACK_MIN_COVERAGE = float(os.getenv("RETRIEVAL_FALLBACK_MIN_COVERAGE", "0.5"))
+
+# History partition maintenance
+HISTORY_PARTITION_MONTHS_AHEAD = int(os.getenv("HISTORY_PARTITION_MONTHS_AHEAD", "3"))
+HISTORY_RETENTION_MONTHS = int(os.getenv("HISTORY_RETENTION_MONTHS", "12"))
+HISTORY_ARCHIVE_DIR = os.getenv("HISTORY_ARCHIVE_DIR", "archives/history")
+HISTORY_LOCK_TIMEOUT = os.getenv("HISTORY_LOCK_TIMEOUT", "2s")
+HISTORY_LOCK_RETRIES = int(os.getenv("HISTORY_LOCK_RETRIES", "5"))
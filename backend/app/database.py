@@ -38,3 +38,30 @@ def get_db():
             if cur:
                 cur.close()
             conn.close()
+
+@contextmanager
+def get_autocommit_db():
+    """Database connection context manager without a transaction block.
+
+    Needed for statements that cannot run inside a transaction, such as
+    ALTER TABLE ... DETACH PARTITION ... CONCURRENTLY.
+    """
+    conn = None
+    cur = None
+    try:
+        conn = psycopg2.connect(
+            host=config.DB_HOST,
+            port=config.DB_PORT,
+            dbname=config.DB_NAME,
+            user=config.DB_USER,
+            password=config.DB_PASSWORD,
+            cursor_factory=RealDictCursor
+        )
+        conn.autocommit = True
+        cur = conn.cursor()
+        yield cur
+    finally:
+        if conn:
+            if cur:
+                cur.close()
+            conn.close()
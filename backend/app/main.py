@@ -1,9 +1,13 @@
+import logging
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from . import config
+from .maintenance import ensure_history_partitions
 from .api import qa, history, admin, pdf
 from .auth import router as auth_router
 
+logger = logging.getLogger(__name__)
+
 # Create FastAPI app
 app = FastAPI(
     title="ExamoBuddy API",
@@ -27,6 +31,15 @@ app.include_router(history.router, prefix=f"{config.API_PREFIX}/history", tags=[
 app.include_router(admin.router, prefix=f"{config.API_PREFIX}/admin", tags=["Admin"])
 app.include_router(pdf.router, prefix=f"{config.API_PREFIX}/pdf", tags=["PDF"])
 
+@app.on_event("startup")
+def create_history_partitions():
+    """Make sure the upcoming monthly history partitions exist."""
+    try:
+        ensure_history_partitions()
+    except Exception:
+        # Partitions are created months ahead, so don't block startup
+        logger.exception("Could not create history partitions")
+
 @app.get("/")
 async def root():
     """Root endpoint to check if the API is running."""
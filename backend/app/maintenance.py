@@ -0,0 +1,164 @@
+import gzip
+import logging
+import os
+import re
+import time
+from datetime import date
+from psycopg2 import errors, sql
+from . import config
+from .database import get_db, get_autocommit_db
+
+logger = logging.getLogger(__name__)
+
+# Monthly history partitions are named history_pYYYY_MM (see setup_db.sql)
+PARTITION_NAME_PATTERN = re.compile(r"^history_p(\d{4})_(\d{2})$")
+
+def add_months(month, months):
+    """Get the first day of the month that is `months` months after `month`."""
+    index = month.year * 12 + (month.month - 1) + months
+    return date(index // 12, index % 12 + 1, 1)
+
+def with_lock_retry(action, description):
+    """Run a DDL action, retrying when it gives up waiting for a lock.
+
+    The action is expected to set lock_timeout, so a DDL statement stuck behind
+    a long query on history fails fast instead of queueing every other reader
+    and writer behind it.
+    """
+    for attempt in range(1, config.HISTORY_LOCK_RETRIES + 1):
+        try:
+            return action()
+        except errors.LockNotAvailable:
+            if attempt == config.HISTORY_LOCK_RETRIES:
+                raise
+            logger.warning("Lock timeout while trying to %s, retrying (attempt %s)", description, attempt)
+            time.sleep(attempt)
+
+def create_history_partition(month):
+    """Create the history partition for one month in its own short transaction."""
+    def create():
+        with get_db() as db:
+            db.execute("SET LOCAL lock_timeout = %s", (config.HISTORY_LOCK_TIMEOUT,))
+            db.execute("SELECT create_history_partition(%s)", (month,))
+
+    with_lock_retry(create, f"create history partition for {month.strftime('%Y-%m')}")
+
+def ensure_history_partitions(months_ahead=None):
+    """Create history partitions for the current month and the upcoming ones.
+
+    Each month is created separately, so one failing month does not stop the
+    others. Raises RuntimeError listing the failed months at the end.
+    """
+    if months_ahead is None:
+        months_ahead = config.HISTORY_PARTITION_MONTHS_AHEAD
+
+    this_month = date.today().replace(day=1)
+    failed = []
+    for i in range(months_ahead + 1):
+        month = add_months(this_month, i)
+        try:
+            create_history_partition(month)
+        except Exception:
+            logger.exception("Could not create history partition for %s", month.strftime("%Y-%m"))
+            failed.append(month.strftime("%Y-%m"))
+
+    if failed:
+        raise RuntimeError(f"Could not create history partitions for {', '.join(failed)}")
+
+def get_history_partitions(db):
+    """Get the monthly history partitions as (name, month) tuples, oldest first."""
+    db.execute("""
+        SELECT c.relname AS name
+        FROM pg_inherits i
+        JOIN pg_class c ON c.oid = i.inhrelid
+        WHERE i.inhparent = 'history'::regclass
+    """)
+
+    partitions = []
+    for row in db.fetchall():
+        match = PARTITION_NAME_PATTERN.match(row["name"])
+        if match:
+            partitions.append((row["name"], date(int(match.group(1)), int(match.group(2)), 1)))
+
+    return sorted(partitions, key=lambda partition: partition[1])
+
+def retention_cutoff(today=None, retention_months=None):
+    """Get the first month that is still kept under the retention policy."""
+    if today is None:
+        today = date.today()
+    if retention_months is None:
+        retention_months = config.HISTORY_RETENTION_MONTHS
+
+    return add_months(today.replace(day=1), -retention_months)
+
+def detach_history_partition(name):
+    """Detach a history partition without blocking queries on history.
+
+    DETACH PARTITION ... CONCURRENTLY only takes a SHARE UPDATE EXCLUSIVE lock
+    on history, but cannot run inside a transaction block. If an earlier
+    attempt was interrupted, the partition is left pending detach and is
+    finished with FINALIZE instead.
+    """
+    table = sql.Identifier(name)
+
+    def detach():
+        with get_autocommit_db() as db:
+            db.execute("SET lock_timeout = %s", (config.HISTORY_LOCK_TIMEOUT,))
+            db.execute(
+                "SELECT inhdetachpending FROM pg_inherits WHERE inhrelid = to_regclass(%s)",
+                (name,)
+            )
+            row = db.fetchone()
+            if row is None:
+                return
+            mode = "FINALIZE" if row["inhdetachpending"] else "CONCURRENTLY"
+            db.execute(sql.SQL("ALTER TABLE history DETACH PARTITION {} " + mode).format(table))
+
+    with_lock_retry(detach, f"detach {name}")
+
+def archive_history_partitions(retention_months=None, archive_dir=None):
+    """Archive history partitions older than the retention period.
+
+    Each partition is first exported to a gzipped CSV file in archive_dir while
+    it is still attached, which only needs a read lock. It is then detached
+    concurrently and the detached table is dropped, which no longer touches
+    the history table.
+    """
+    if archive_dir is None:
+        archive_dir = config.HISTORY_ARCHIVE_DIR
+    cutoff = retention_cutoff(retention_months=retention_months)
+
+    os.makedirs(archive_dir, exist_ok=True)
+
+    with get_db() as db:
+        expired = [name for name, month in get_history_partitions(db) if month < cutoff]
+
+    archived = []
+    for name in expired:
+        path = os.path.join(archive_dir, f"{name}.csv.gz")
+        table = sql.Identifier(name)
+
+        with get_db() as db:
+            with gzip.open(path, "wt", encoding="utf-8") as archive:
+                db.copy_expert(
+                    sql.SQL("COPY {} TO STDOUT WITH (FORMAT csv, HEADER)").format(table).as_string(db),
+                    archive
+                )
+
+        detach_history_partition(name)
+
+        with get_db() as db:
+            db.execute(sql.SQL("DROP TABLE {}").format(table))
+
+        archived.append(path)
+
+    return archived
+
+if __name__ == "__main__":
+    # Run periodically (e.g. daily from cron): python -m app.maintenance
+    logging.basicConfig(level=logging.INFO)
+    try:
+        ensure_history_partitions()
+    finally:
+        for path in archive_history_partitions():
+            logger.info("Archived %s", path)
@@ -24,6 +24,9 @@ class QuestionRequest(BaseModel):
 class AnswerResponse(BaseModel):
     answer: str
 
+class BatchQuestionRequest(BaseModel):
+    questions: List[str]
+
 # History schemas
 class HistoryItem(BaseModel):
     id: int
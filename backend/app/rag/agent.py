@@ -1,10 +1,10 @@
-from haystack import Pipeline
-from haystack.components.retrievers import InMemoryBM25Retriever
 from haystack.components.generators import OpenAIGenerator
 from haystack.agents import Agent, Tool
 import requests
 import asyncio
-from .document_store import get_document_store
+from .classifier import classify_subject
+from .document_store import search_documents_batch
+from ..database import get_db
 from .. import config
 
 # Perplexity API Tool
@@ -36,23 +36,58 @@ async def medical_reasoning(question: str, context: str) -> str:
     )
     return response.json()["choices"][0]["message"]["content"]
 
-# Create Haystack Agent
-def get_agent():
-    """Get the Haystack agent with tools."""
-    # Get document store
-    document_store = get_document_store()
-    
-    # Create retrieval pipeline
-    retrieval_pipeline = Pipeline()
-    retrieval_pipeline.add_component(
-        "retriever", 
-        InMemoryBM25Retriever(document_store=document_store)
+# Subject-aware retrieval
+def retrieve_documents_batch(db, queries, top_k=None):
+    """Retrieve documents for several queries, prefiltered on their subjects.
+
+    All queries with a subject are searched in one statement restricted to
+    their subject. The queries without a subject, or whose best filtered
+    document contains less than RETRIEVAL_FALLBACK_MIN_COVERAGE of their
+    search terms, are then searched across the whole corpus in a second
+    statement.
+    """
+    if top_k is None:
+        top_k = config.QA_RETRIEVAL_TOP_K
+
+    results = [[] for _ in queries]
+    subjects = [classify_subject(query) for query in queries]
+
+    tagged = [i for i, subject in enumerate(subjects) if subject]
+    filtered, coverage = search_documents_batch(
+        db, [queries[i] for i in tagged], top_k, subjects=[subjects[i] for i in tagged]
     )
+    for i, documents, best_coverage in zip(tagged, filtered, coverage):
+        if best_coverage >= config.RETRIEVAL_FALLBACK_MIN_COVERAGE:
+            results[i] = documents
+
+    # Fall back to a global search for the rest
+    fallback = [i for i in range(len(queries)) if not results[i]]
+    documents, _ = search_documents_batch(db, [queries[i] for i in fallback], top_k)
+    for i, found in zip(fallback, documents):
+        results[i] = found
+
+    return results
+
+def retrieve_documents(db, query, top_k=None):
+    """Retrieve documents for a single query, prefiltered on its subject."""
+    return retrieve_documents_batch(db, [query], top_k=top_k)[0]
+
+# Create Haystack Agent
+def get_agent(with_retrieval=True):
+    """Get the Haystack agent with tools.
+
+    Callers that already put the retrieved documents in the context (like the
+    batch endpoint) pass with_retrieval=False to leave the retrieval tool out.
+    """
+    async def subject_retrieval(query: str):
+        """Retrieve documents, prefiltered on the question's subject."""
+        with get_db() as db:
+            return retrieve_documents(db, query)
     
     # Create tools
     retrieval_tool = Tool(
         name="retrieve_documents",
-        pipeline_or_node=retrieval_pipeline,
+        pipeline_or_node=subject_retrieval,
         description="Retrieve relevant medical documents"
     )
     
@@ -68,6 +103,10 @@ def get_agent():
         description="Apply medical reasoning to analyze questions"
     )
     
+    tools = [perplexity_tool, reasoning_tool]
+    if with_retrieval:
+        tools.insert(0, retrieval_tool)
+    
     # Create agent with tools
     agent = Agent(
         prompt_template="""You are a medical assistant for MBBS students.
@@ -75,7 +114,7 @@ def get_agent():
 Question: {query}
 
 Think step by step to answer the question. Use the tools available to you to retrieve relevant information and perform deep research.""",
-        tools=[retrieval_tool, perplexity_tool, reasoning_tool],
+        tools=tools,
         llm=OpenAIGenerator(
             api_key=config.OPENROUTER_API_KEY,
             model="meta-llama/llama-3-8b",
@@ -0,0 +1,128 @@
+import re
+from .. import config
+
+# Weighted keywords for the MBBS subjects we tag questions and documents with.
+# Terms distinctive of one subject weigh up to 3, supporting terms 1; words
+# shared across many subjects (management, diagnosis, drug, ...) are left out.
+# Multi-word keywords are matched as phrases, with an optional plural "s".
+SUBJECT_KEYWORDS = {
+    "anatomy": {
+        "brachial plexus": 3, "lumbar plexus": 3, "foramen": 3, "fossa": 3, "fascia": 3,
+        "embryology": 3, "histology": 3, "innervation": 3, "nerve supply": 3,
+        "blood supply": 3, "lymphatic drainage": 3, "relations": 3, "derivatives": 3,
+        "pharyngeal arch": 3, "development of": 2, "origin": 1, "insertion": 2,
+        "artery": 1, "vein": 1, "nerve": 1, "muscle": 1, "ligament": 1, "triangle": 1,
+    },
+    "physiology": {
+        "physiology": 3, "cardiac output": 3, "action potential": 3, "membrane potential": 3,
+        "homeostasis": 3, "renal clearance": 3, "gfr": 3, "cardiac cycle": 3,
+        "lung compliance": 3, "oxygen dissociation curve": 3, "resting potential": 3,
+        "synapse": 1, "reflex": 1, "hormone": 1, "regulation of": 1,
+    },
+    "biochemistry": {
+        "biochemistry": 3, "glycolysis": 3, "krebs cycle": 3, "gluconeogenesis": 3,
+        "urea cycle": 3, "inborn error": 3, "lipoprotein": 3, "coenzyme": 3,
+        "beta oxidation": 3, "enzyme kinetics": 3, "enzyme": 1, "metabolism": 1,
+        "vitamin": 1, "amino acid": 1,
+    },
+    "pathology": {
+        "pathology": 3, "pathogenesis": 3, "neoplasia": 3, "carcinoma": 3, "sarcoma": 3,
+        "necrosis": 3, "apoptosis": 3, "granuloma": 3, "metaplasia": 3, "dysplasia": 3,
+        "amyloidosis": 3, "morphology": 2, "gross and microscopic": 3, "inflammation": 1,
+        "tumor": 1, "tumour": 1, "thrombosis": 1, "embolism": 1, "infarction": 1,
+    },
+    "pharmacology": {
+        "pharmacology": 3, "mechanism of action": 3, "pharmacokinetics": 3,
+        "pharmacodynamics": 3, "bioavailability": 3, "half-life": 3, "drug interaction": 3,
+        "adverse effect": 2, "side effect": 2, "contraindication": 2, "agonist": 2,
+        "antagonist": 2, "inhibitor": 1, "drug of choice": 2, "dosage": 1,
+    },
+    "microbiology": {
+        "microbiology": 3, "bacteria": 3, "bacterium": 3, "virus": 3, "fungus": 3,
+        "parasite": 3, "culture medium": 3, "gram positive": 3, "gram negative": 3,
+        "laboratory diagnosis": 3, "sterilization": 3, "staining": 2, "pathogen": 2,
+        "antigen": 1, "antibody": 1, "vaccine": 1,
+    },
+    "forensic_medicine": {
+        "forensic": 3, "autopsy": 3, "postmortem": 3, "post-mortem": 3, "rigor mortis": 3,
+        "medicolegal": 3, "asphyxia": 3, "poisoning": 2, "toxicology": 2,
+    },
+    "community_medicine": {
+        "epidemiology": 3, "incidence": 2, "prevalence": 2, "screening": 2,
+        "national programme": 3, "national program": 3, "immunization schedule": 3,
+        "sanitation": 3, "biostatistics": 3, "sample size": 3, "cohort": 2,
+        "case control": 3, "public health": 3,
+    },
+    "medicine": {
+        "clinical features": 1, "hypertension": 2, "diabetes mellitus": 2,
+        "heart failure": 2, "asthma": 2, "pneumonia": 2, "cirrhosis": 2, "ecg": 2,
+        "anemia": 1, "anaemia": 1, "tuberculosis": 1,
+    },
+    "surgery": {
+        "surgery": 3, "surgical": 3, "incision": 3, "hernia": 3, "appendicitis": 3,
+        "laparotomy": 3, "anastomosis": 3, "fracture": 2, "abscess": 1, "burns": 2,
+    },
+    "obstetrics_gynecology": {
+        "pregnancy": 3, "gestation": 3, "placenta": 3, "antenatal": 3, "postpartum": 3,
+        "eclampsia": 3, "contraception": 3, "menstrual": 3, "ectopic": 3, "labour": 2,
+        "fetus": 2, "foetus": 2, "uterus": 2, "ovary": 2, "cervix": 2,
+    },
+    "pediatrics": {
+        "neonate": 3, "newborn": 3, "pediatric": 3, "paediatric": 3, "milestone": 3,
+        "growth chart": 3, "breastfeeding": 3, "infant": 2,
+    },
+    "ophthalmology": {
+        "retina": 3, "cornea": 3, "glaucoma": 3, "cataract": 3, "conjunctivitis": 3,
+        "visual acuity": 3, "uveitis": 3, "eye": 1,
+    },
+    "ent": {
+        "tonsil": 3, "larynx": 3, "sinusitis": 3, "otitis": 3, "hearing loss": 3,
+        "tympanic": 3, "epistaxis": 3, "middle ear": 2, "inner ear": 2, "ear": 1,
+    },
+}
+
+# Precompiled whole-word patterns, one per keyword
+_SUBJECT_PATTERNS = {
+    subject: [
+        (re.compile(r"\b" + re.escape(keyword) + r"s?\b"), weight)
+        for keyword, weight in keywords.items()
+    ]
+    for subject, keywords in SUBJECT_KEYWORDS.items()
+}
+
+def score_subjects(text: str) -> dict:
+    """Sum the weights of keyword hits per subject for a piece of text."""
+    lowered = text.lower()
+    scores = {}
+    for subject, patterns in _SUBJECT_PATTERNS.items():
+        score = sum(weight * len(pattern.findall(lowered)) for pattern, weight in patterns)
+        if score:
+            scores[subject] = score
+    return scores
+
+def classify_subject(text: str):
+    """Classify text into an MBBS subject.
+
+    Returns the subject name, or None when no subject wins clearly enough
+    for the text to be tagged.
+    """
+    scores = score_subjects(text)
+    if not scores:
+        return None
+
+    ranked = sorted(scores.items(), key=lambda item: item[1], reverse=True)
+    subject, score = ranked[0]
+    if score < config.SUBJECT_MIN_SCORE:
+        return None
+    # Ties are ambiguous, so leave the text untagged
+    if len(ranked) > 1 and ranked[1][1] == score:
+        return None
+    return subject
+
+def tag_documents(documents):
+    """Add a "subject" entry to the metadata of each document that can be classified."""
+    for document in documents:
+        subject = classify_subject(document.content or "")
+        if subject:
+            document.meta["subject"] = subject
+    return documents
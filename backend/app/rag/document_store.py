@@ -1,5 +1,12 @@
+import json
+import re
+import sys
+from haystack import Document
 from haystack_integrations.document_stores.pgvector import PgvectorDocumentStore
+from psycopg2.extras import execute_values
+from .classifier import classify_subject, tag_documents
 from .. import config
+from ..database import get_db
 
 def get_document_store():
     """Get the PgvectorDocumentStore instance."""
@@ -15,3 +22,167 @@ def get_document_store():
     )
     
     return document_store
+
+# Instruction words common in exam questions that say nothing about the topic
+QUESTION_WORDS = re.compile(
+    r"\b(?:describe|explain|discuss|write|short|notes?|enumerate|mention|list|define|"
+    r"briefly|brief|elaborate|outline|illustrate|give|account|what|which|why|how)\b",
+    re.IGNORECASE
+)
+
+def strip_question_words(query):
+    """Remove exam instruction words from a question before searching."""
+    return QUESTION_WORDS.sub(" ", query)
+
+def search_documents_batch(db, queries, top_k, subjects=None):
+    """Full-text search over the vectors table for several queries in one statement.
+
+    Returns one list of documents per query, plus the best term coverage per
+    query: the share of the query's search terms found in its best matching
+    document. Unlike ts_rank with OR'd terms, coverage does not shrink as
+    questions get longer. When subjects is given (one subject per query),
+    each query only searches the rows tagged with its subject, using
+    idx_vectors_subject.
+    """
+    if not queries:
+        return [], []
+
+    subject_filter = "AND v.metadata->>'subject' = q.subject" if subjects else ""
+    # OR the query terms together; plainto_tsquery would require all of them.
+    # Coverage is only computed for the top-k rows of each query.
+    db.execute(
+        f"""
+        SELECT q.idx, d.document_text, d.metadata, d.score,
+               (
+                   SELECT count(*)
+                   FROM unnest(tsvector_to_array(t.qv)) AS lex
+                   WHERE lex = ANY(tsvector_to_array(to_tsvector('english', d.document_text)))
+               )::float / GREATEST(length(t.qv), 1) AS coverage
+        FROM unnest(%s::text[], %s::text[]) WITH ORDINALITY AS q (query, subject, idx)
+        CROSS JOIN LATERAL (
+            SELECT to_tsvector('english', q.query) AS qv,
+                   replace(plainto_tsquery('english', q.query)::text, '&', '|')::tsquery AS tsq
+        ) t
+        CROSS JOIN LATERAL (
+            SELECT v.document_text, v.metadata,
+                   ts_rank(to_tsvector('english', v.document_text), t.tsq, 32) AS score
+            FROM vectors v
+            WHERE to_tsvector('english', v.document_text) @@ t.tsq
+            {subject_filter}
+            ORDER BY score DESC
+            LIMIT %s
+        ) d
+        ORDER BY q.idx, d.score DESC
+        """,
+        (
+            [strip_question_words(query) for query in queries],
+            list(subjects) if subjects else [None] * len(queries),
+            top_k
+        )
+    )
+
+    results = [[] for _ in queries]
+    coverage = [0.0 for _ in queries]
+    for row in db.fetchall():
+        i = row["idx"] - 1
+        results[i].append(
+            Document(content=row["document_text"], meta=row["metadata"] or {}, score=row["score"])
+        )
+        coverage[i] = max(coverage[i], row["coverage"])
+    return results, coverage
+
+def write_documents(documents):
+    """Tag documents with their subject and insert them into the vectors table."""
+    tag_documents(documents)
+
+    rows = [
+        (
+            str(list(document.embedding)) if document.embedding is not None else None,
+            document.content,
+            json.dumps(document.meta or {})
+        )
+        for document in documents
+    ]
+    if not rows:
+        return 0
+
+    with get_db() as db:
+        execute_values(
+            db,
+            "INSERT INTO vectors (embedding, document_text, metadata) VALUES %s",
+            rows,
+            template="(%s::vector, %s, %s::jsonb)"
+        )
+
+    return len(rows)
+
+def ingest_text_files(paths):
+    """Split text files into paragraph chunks and write them to the vectors table."""
+    documents = []
+    for path in paths:
+        with open(path, encoding="utf-8") as f:
+            for chunk in f.read().split("\n\n"):
+                chunk = chunk.strip()
+                if chunk:
+                    documents.append(Document(content=chunk, meta={"source": path}))
+
+    return write_documents(documents)
+
+def backfill_subject_metadata(batch_size=500):
+    """Tag already ingested chunks that have no subject in their metadata.
+
+    Rows are read in pages by id. Chunks that cannot be classified get a null
+    subject so later runs skip them.
+    """
+    updated = 0
+    last_id = 0
+    while True:
+        with get_db() as db:
+            db.execute(
+                """
+                SELECT id, document_text FROM vectors
+                WHERE id > %s AND (metadata IS NULL OR NOT metadata ? 'subject')
+                ORDER BY id
+                LIMIT %s
+                """,
+                (last_id, batch_size)
+            )
+            rows = db.fetchall()
+            if not rows:
+                break
+
+            subjects = [classify_subject(row["document_text"]) for row in rows]
+            tagged = [
+                (row["id"], json.dumps({"subject": subject}))
+                for row, subject in zip(rows, subjects)
+            ]
+
+            # Merge the subject into the existing metadata
+            execute_values(
+                db,
+                """
+                UPDATE vectors AS v
+                SET metadata = COALESCE(v.metadata, '{}'::jsonb) || data.meta::jsonb
+                FROM (VALUES %s) AS data (id, meta)
+                WHERE v.id = data.id
+                """,
+                tagged,
+                page_size=len(tagged)
+            )
+
+            last_id = rows[-1]["id"]
+            updated += sum(1 for subject in subjects if subject)
+
+    return updated
+
+if __name__ == "__main__":
+    # python -m app.rag.document_store ingest <file.txt>...
+    # python -m app.rag.document_store backfill
+    command = sys.argv[1] if len(sys.argv) > 1 else ""
+    if command == "ingest" and len(sys.argv) > 2:
+        print(f"Ingested {ingest_text_files(sys.argv[2:])} chunks")
+    elif command == "backfill":
+        print(f"Tagged {backfill_subject_metadata()} chunks")
+    else:
+        print("Usage: python -m app.rag.document_store ingest <file.txt>... | backfill")
+        sys.exit(1)
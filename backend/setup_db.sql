@@ -10,14 +10,107 @@ CREATE TABLE IF NOT EXISTS users (
     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
 );
 
--- Create history table
+-- Move an existing unpartitioned history table out of the way so its rows
+-- can be copied into the partitioned table below
+DO $$
+BEGIN
+    IF EXISTS (
+        SELECT 1 FROM pg_class
+        WHERE relname = 'history' AND relkind = 'r' AND relnamespace = 'public'::regnamespace
+    ) THEN
+        ALTER SEQUENCE IF EXISTS history_id_seq OWNED BY NONE;
+        ALTER TABLE history RENAME TO history_unpartitioned;
+        ALTER INDEX IF EXISTS history_pkey RENAME TO history_unpartitioned_pkey;
+    END IF;
+END $$;
+
+-- Create history table, range partitioned by month on timestamp
+CREATE SEQUENCE IF NOT EXISTS history_id_seq;
+
 CREATE TABLE IF NOT EXISTS history (
-    id SERIAL PRIMARY KEY,
+    id INT NOT NULL DEFAULT nextval('history_id_seq'),
     user_id INT REFERENCES users(id),
     question TEXT NOT NULL,
     answer TEXT NOT NULL,
-    timestamp TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-);
+    timestamp TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (id, timestamp)
+) PARTITION BY RANGE (timestamp);
+
+ALTER SEQUENCE history_id_seq OWNED BY history.id;
+
+-- Indexes are created on every partition automatically
+CREATE INDEX IF NOT EXISTS idx_history_user_timestamp ON history (user_id, timestamp DESC);
+CREATE INDEX IF NOT EXISTS idx_history_timestamp ON history (timestamp);
+
+-- Create the monthly partition containing the given date (history_pYYYY_MM).
+-- There is deliberately no default partition: it would rule out
+-- DETACH PARTITION ... CONCURRENTLY when archiving. Upcoming partitions are
+-- created ahead of time by app/maintenance.py (and at app startup).
+CREATE OR REPLACE FUNCTION create_history_partition(p_month DATE)
+RETURNS TEXT AS $$
+DECLARE
+    start_date DATE := date_trunc('month', p_month)::DATE;
+    end_date DATE := (date_trunc('month', p_month) + INTERVAL '1 month')::DATE;
+    partition_name TEXT := 'history_p' || to_char(start_date, 'YYYY_MM');
+BEGIN
+    -- Checking first avoids taking a lock on history when there is nothing to do
+    IF to_regclass(partition_name) IS NULL THEN
+        EXECUTE format(
+            'CREATE TABLE IF NOT EXISTS %I PARTITION OF history FOR VALUES FROM (%L) TO (%L)',
+            partition_name, start_date, end_date
+        );
+    END IF;
+    RETURN partition_name;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Create partitions for the current month and the next three
+SELECT create_history_partition((date_trunc('month', CURRENT_DATE) + make_interval(months => i))::DATE)
+FROM generate_series(0, 3) AS i;
+
+-- Earlier versions of this script used a default partition and a SQL
+-- ensure_history_partitions(); move any rows out of the default and drop both
+DROP FUNCTION IF EXISTS ensure_history_partitions(INT);
+
+DO $$
+DECLARE
+    month DATE;
+BEGIN
+    IF to_regclass('history_default') IS NOT NULL THEN
+        ALTER TABLE history DETACH PARTITION history_default;
+        FOR month IN SELECT DISTINCT date_trunc('month', timestamp)::DATE FROM history_default LOOP
+            PERFORM create_history_partition(month);
+        END LOOP;
+        INSERT INTO history (id, user_id, question, answer, timestamp)
+        SELECT id, user_id, question, answer, timestamp FROM history_default;
+        DROP TABLE history_default;
+    END IF;
+END $$;
+
+-- Copy rows from the old unpartitioned table, if there was one
+DO $$
+DECLARE
+    month DATE;
+BEGIN
+    IF EXISTS (
+        SELECT 1 FROM pg_class
+        WHERE relname = 'history_unpartitioned' AND relnamespace = 'public'::regnamespace
+    ) THEN
+        FOR month IN
+            SELECT DISTINCT date_trunc('month', COALESCE(timestamp, CURRENT_TIMESTAMP))::DATE
+            FROM history_unpartitioned
+        LOOP
+            PERFORM create_history_partition(month);
+        END LOOP;
+
+        INSERT INTO history (id, user_id, question, answer, timestamp)
+        SELECT id, user_id, question, answer, COALESCE(timestamp, CURRENT_TIMESTAMP)
+        FROM history_unpartitioned;
+
+        PERFORM setval('history_id_seq', GREATEST((SELECT COALESCE(MAX(id), 0) FROM history), 1));
+        DROP TABLE history_unpartitioned;
+    END IF;
+END $$;
 
 -- Create vectors table for document embeddings
 CREATE TABLE IF NOT EXISTS vectors (
@@ -27,6 +120,12 @@ CREATE TABLE IF NOT EXISTS vectors (
     metadata JSONB
 );
 
+-- Index the document subject so retrieval can prefilter on it
+CREATE INDEX IF NOT EXISTS idx_vectors_subject ON vectors ((metadata->>'subject'));
+
+-- Full-text index used by the keyword search in rag/document_store.py
+CREATE INDEX IF NOT EXISTS idx_vectors_document_tsv ON vectors USING GIN (to_tsvector('english', document_text));
+
 -- Insert admin user for testing (password: admin123)
 INSERT INTO users (username, password_hash, is_admin) 
 VALUES ('admin', '$2b$12$BnlkuACZiHUs8h0TLWejg.XyPEKLt.TYYORZbf/gfFd/S8sO77lt.', true)